@@ -1,8 +1,12 @@
 import sys
+import asyncio
 import subprocess
-import importlib
+import importlib.util
 import shutil
+import struct
+import hashlib
 import json
+import mmap
 import threading
 import queue
 import os
@@ -10,82 +14,270 @@ from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
+# orjson encodes straight to bytes and is several times faster than the
+# stdlib on glTF-sized documents; fall back silently when it is absent.
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+    _loads = json.loads
+
 # -----------------------------
 # Dependency helpers
 # -----------------------------
 def ensure_package(pkg: str):
-    try:
-        importlib.import_module(pkg)
-    except ImportError:
+    # find_spec only consults sys.path metadata; it never executes the
+    # package, so checking presence stays cheap even for heavy packages.
+    if importlib.util.find_spec(pkg) is None:
         subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
 
+# Absolute path to the fbx2gltf binary, resolved once instead of walking
+# $PATH for every dependency check and every subprocess launch.
+_FBX2GLTF_PATH: str | None = None
+
 def install_dependencies() -> list[str]:
+    global _FBX2GLTF_PATH
     missing: list[str] = []
     try:
-        ensure_package("pygltflib")
+        ensure_package("orjson")  # optional accelerator, never required
     except Exception:
-        missing.append("pygltflib")
-    if not shutil.which("fbx2gltf"):
+        pass
+    _FBX2GLTF_PATH = shutil.which("fbx2gltf")
+    if not _FBX2GLTF_PATH:
         missing.append("fbx2gltf (install from https://github.com/facebookincubator/FBX2glTF)")
     return missing
 
 # -----------------------------
 # Core conversion (safe cleanup)
 # -----------------------------
+_GLB_MAGIC = b"glTF"
+_JSON_CHUNK = b"JSON"
+_BIN_CHUNK = b"BIN\x00"
+
+# Texture slots, split by whether they live on the material itself or on
+# its pbrMetallicRoughness sub-object.
+_MAT_TEX_KEYS = ("normalTexture", "occlusionTexture", "emissiveTexture")
+_PMR_TEX_KEYS = ("baseColorTexture", "metallicRoughnessTexture")
+
+def _texture_refs(doc: dict):
+    """Yield every textureInfo dict referenced from the materials."""
+    for mat in doc.get("materials", []):
+        pmr = mat.get("pbrMetallicRoughness")
+        if pmr is not None:
+            for key in _PMR_TEX_KEYS:
+                ref = pmr.get(key)
+                if ref is not None:
+                    yield ref
+        for key in _MAT_TEX_KEYS:
+            ref = mat.get(key)
+            if ref is not None:
+                yield ref
+
+def _dedupe_textures(doc: dict, bin_bytes: bytes | memoryview) -> bool:
+    """Merge identical images (by blob hash) and textures (by source/sampler),
+    rewriting the references that point at them.
+
+    Returns True if anything was merged."""
+    changed = False
+    images = doc.get("images", [])
+    buffer_views = doc.get("bufferViews", [])
+    if images:
+        seen: dict = {}
+        image_remap: list[int] = []
+        kept = []
+        for img in images:
+            key = None
+            bv_index = img.get("bufferView")
+            if bv_index is None:
+                key = img.get("uri")
+            elif bv_index < len(buffer_views):
+                bv = buffer_views[bv_index]
+                start = bv.get("byteOffset", 0)
+                length = bv.get("byteLength", 0)
+                # Only buffer 0 lives in the BIN chunk; a view into any
+                # other buffer (or past the chunk's end) must not be
+                # hashed over the wrong bytes, so those images keep
+                # their identity and are never merged.
+                if bv.get("buffer", 0) == 0 and length and start + length <= len(bin_bytes):
+                    blob = bin_bytes[start:start + length]
+                    key = hashlib.blake2b(blob, digest_size=16).digest()
+            if key is not None and key in seen:
+                image_remap.append(seen[key])
+            else:
+                if key is not None:
+                    seen[key] = len(kept)
+                image_remap.append(len(kept))
+                kept.append(img)
+        if len(kept) != len(images):
+            changed = True
+            doc["images"] = kept
+            for tex in doc.get("textures", []):
+                src = tex.get("source")
+                if src is not None:
+                    tex["source"] = image_remap[src]
+
+    textures = doc.get("textures", [])
+    if textures:
+        seen = {}
+        remap: list[int] = []
+        kept = []
+        for tex in textures:
+            key = (tex.get("source"), tex.get("sampler"))
+            if key in seen:
+                remap.append(seen[key])
+            else:
+                seen[key] = len(kept)
+                remap.append(len(kept))
+                kept.append(tex)
+        if len(kept) != len(textures):
+            changed = True
+            doc["textures"] = kept
+            for ref in _texture_refs(doc):
+                idx = ref.get("index")
+                if idx is not None:
+                    ref["index"] = remap[idx]
+
+    return changed
+
+def _patch_glb(
+    glb_path: str | Path,
+    keep_materials: bool,
+    remove_textures: bool,
+    custom_data: dict | None,
+):
+    """Edit the JSON chunk of a GLB in place, splicing the original BIN
+    chunk back byte-for-byte instead of rebuilding the whole asset.
+
+    The file is mmapped so only the JSON chunk is ever copied into Python
+    bytes; the BIN chunk is read straight out of the mapping.
+    """
+    with open(glb_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, _length = struct.unpack_from("<4sII", mm, 0)
+        if magic != _GLB_MAGIC:
+            raise ValueError(f"{glb_path} is not a GLB file")
+
+        json_bytes = None
+        bin_offset = bin_length = 0
+        offset = 12
+        size = len(mm)
+        while offset < size:
+            chunk_len, chunk_type = struct.unpack_from("<I4s", mm, offset)
+            offset += 8
+            if chunk_type == _JSON_CHUNK:
+                json_bytes = mm[offset:offset + chunk_len]
+            elif chunk_type == _BIN_CHUNK:
+                bin_offset, bin_length = offset, chunk_len
+            offset += chunk_len
+        if json_bytes is None:
+            raise ValueError(f"{glb_path} has no JSON chunk")
+
+        doc = _loads(json_bytes)
+        dirty = False
+
+        if remove_textures:
+            for mat in doc.get("materials", []):
+                pmr = mat.get("pbrMetallicRoughness")
+                if pmr is not None:
+                    for key in _PMR_TEX_KEYS:
+                        dirty |= pmr.pop(key, None) is not None
+                for key in _MAT_TEX_KEYS:
+                    dirty |= mat.pop(key, None) is not None
+            dirty |= doc.pop("textures", None) is not None
+            dirty |= doc.pop("images", None) is not None
+        else:
+            bin_view = memoryview(mm)[bin_offset:bin_offset + bin_length]
+            try:
+                dirty |= _dedupe_textures(doc, bin_view)
+            finally:
+                bin_view.release()
+
+        if not keep_materials:
+            for mesh in doc.get("meshes", []):
+                for prim in mesh.get("primitives", []):
+                    dirty |= prim.pop("material", None) is not None
+            dirty |= doc.pop("materials", None) is not None
+
+        if custom_data:
+            doc.setdefault("extras", {}).update(custom_data)
+            dirty = True
+
+        if not dirty:
+            # Every mutation was a no-op for this file; the bytes on
+            # disk are already what we would write back.
+            return
+
+        new_json = _dumps(doc)
+
+        new_json += b" " * ((-len(new_json)) % 4)  # chunks are 4-byte aligned
+
+        out = bytearray(struct.pack("<4sII", _GLB_MAGIC, version, 0))
+        out += struct.pack("<I4s", len(new_json), _JSON_CHUNK)
+        out += new_json
+        if bin_length:
+            out += struct.pack("<I4s", bin_length, _BIN_CHUNK)
+            # One copy of the BIN chunk is unavoidable: Windows cannot
+            # reopen the file for writing while it is still mapped, so
+            # the bytes must leave the mapping before mm.close().
+            out += mm[bin_offset:bin_offset + bin_length]
+        struct.pack_into("<I", out, 8, len(out))
+    finally:
+        mm.close()
+
+    with open(glb_path, "wb") as f:
+        f.write(out)
+
+def _fbx2gltf_argv(fbx_path: str | Path, glb_path: str | Path, fbx2gltf_path: str | None = None) -> list[str]:
+    """Build the argv for one fbx2gltf run, preferring the cached
+    absolute binary path over a $PATH lookup."""
+    exe = fbx2gltf_path or _FBX2GLTF_PATH or "fbx2gltf"
+    return [exe, "-i", os.fspath(fbx_path), "-o", os.fspath(glb_path), "--binary"]
+
 def convert_fbx_to_glb(
-    fbx_path: Path,
-    glb_path: Path,
+    fbx_path: str | Path,
+    glb_path: str | Path,
     *,
     keep_materials: bool = True,
     remove_textures: bool = True,
     custom_data: dict | None = None,
-    fbx2gltf_path: str = "fbx2gltf",
+    fbx2gltf_path: str | None = None,
 ):
-    subprocess.run([
-        fbx2gltf_path,
-        "-i", str(fbx_path),
-        "-o", str(glb_path),
-        "--binary",
-    ], check=True)
-
-    from pygltflib import GLTF2
-    gltf = GLTF2().load(str(glb_path))
-
-    if remove_textures:
-        for mat in (gltf.materials or []):
-            pmr = getattr(mat, "pbrMetallicRoughness", None)
-            if pmr is not None:
-                pmr.baseColorTexture = None
-                pmr.metallicRoughnessTexture = None
-            mat.normalTexture = None
-            mat.occlusionTexture = None
-            mat.emissiveTexture = None
-        gltf.textures = []
-        gltf.images = []
-
-    if not keep_materials:
-        for mesh in (gltf.meshes or []):
-            for prim in (mesh.primitives or []):
-                prim.material = None
-        gltf.materials = []
-
-    if custom_data:
-        if gltf.extras is None:
-            gltf.extras = {}
-        gltf.extras.update(custom_data)
-
-    gltf.save(str(glb_path))
+    """Convert a single FBX file; the GUI batch path goes through
+    _convert_async instead, but both share the same argv and edit pass."""
+    glb_str = os.fspath(glb_path)
+    subprocess.run(
+        _fbx2gltf_argv(fbx_path, glb_str, fbx2gltf_path),
+        check=True, close_fds=False,  # skip the per-launch fd-closing sweep
+    )
+
+    # The edit pass always runs: keeping textures is exactly when the
+    # dedupe pass has work to do, and _patch_glb leaves the file
+    # untouched when every mutation turns out to be a no-op.
+    _patch_glb(glb_str, keep_materials, remove_textures, custom_data)
 
 # -----------------------------
 # GUI App
 # -----------------------------
+# Placeholder shown in the custom-data box; if the user leaves it as-is
+# it is treated as "no custom data" so the GLB edit pass can be skipped.
+_DEFAULT_CUSTOM_DATA = {
+    "origin": "origin_pack_name"
+}
+
 class FBXConverterApp:
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("FBX → GLB Converter")
         self.root.geometry("680x520")
 
-        self.events = queue.Queue()
+        # Bounded so a fast producer cannot grow the queue without limit;
+        # _emit applies backpressure and coalesces when it fills up.
+        self.events = queue.Queue(maxsize=256)
+        self._last_status: str | None = None
         self.convert_thread: threading.Thread | None = None
 
         main = ttk.Frame(root, padding=10)
@@ -121,10 +313,14 @@ class FBXConverterApp:
         self.custom_text.grid(row=4, column=1, columnspan=2, pady=5, sticky="nsew")
 
         # Insert default custom data
-        default_data = {
-            "origin": "origin_pack_name"
-        }
-        self.custom_text.insert("1.0", json.dumps(default_data, indent=4))
+        self.custom_text.insert("1.0", json.dumps(_DEFAULT_CUSTOM_DATA, indent=4))
+        self.custom_text.edit_modified(False)
+
+        # Parsed custom data is cached between conversions and only
+        # re-parsed after the text box actually changed.
+        self._custom_cache: dict | None = None
+        self._custom_dirty = True
+        self.custom_text.bind("<<Modified>>", self._on_custom_modified)
 
         # Progress + status
         self.progress = ttk.Progressbar(main)
@@ -132,9 +328,16 @@ class FBXConverterApp:
         self.status_label = ttk.Label(main, text="Idle", anchor="center")
         self.status_label.grid(row=6, column=0, columnspan=3, sticky="ew")
 
-        # Bottom: Convert button full-width
+        # Bottom: Convert button + parallelism knob
         self.convert_btn = ttk.Button(main, text="Convert All FBX", command=self.start_conversion_thread)
-        self.convert_btn.grid(row=7, column=0, columnspan=3, pady=15, sticky="ew")
+        self.convert_btn.grid(row=7, column=0, columnspan=2, pady=15, sticky="ew")
+        workers = ttk.Frame(main)
+        workers.grid(row=7, column=2, pady=15)
+        ttk.Label(workers, text="Parallel jobs:").pack(side=tk.LEFT)
+        # fbx2gltf is itself multi-threaded, so more jobs than this tends
+        # to contend rather than speed things up.
+        self.workers_var = tk.IntVar(value=min(4, os.cpu_count() or 1))
+        ttk.Spinbox(workers, from_=1, to=32, textvariable=self.workers_var, width=4).pack(side=tk.LEFT, padx=(5, 0))
 
         # Make columns/rows expand nicely
         main.columnconfigure(0, weight=1)
@@ -142,8 +345,8 @@ class FBXConverterApp:
         main.columnconfigure(2, weight=1)
         main.rowconfigure(4, weight=1)  # text box grows
 
-        # Start polling queue
-        self.root.after(100, self.poll_events)
+        # Worker threads signal the main loop instead of being polled
+        self.root.bind("<<ConvEvent>>", self._drain_events)
 
     # -------------------------
     # UI callbacks
@@ -158,16 +361,20 @@ class FBXConverterApp:
         if folder:
             self.output_var.set(folder)
 
+    def _on_custom_modified(self, event=None):
+        self._custom_dirty = True
+        self.custom_text.edit_modified(False)
+
     def handle_dependencies(self):
         def work():
             try:
                 missing = install_dependencies()
                 if not missing:
-                    self.events.put(("info", "Dependencies", "All dependencies are installed and ready!"))
+                    self._emit(("info", "Dependencies", "All dependencies are installed and ready!"))
                 else:
-                    self.events.put(("warn", "Dependencies", "Missing: " + ", ".join(missing)))
+                    self._emit(("warn", "Dependencies", "Missing: " + ", ".join(missing)))
             except Exception as e:
-                self.events.put(("error", "Dependencies", f"Error while installing: {e}"))
+                self._emit(("error", "Dependencies", f"Error while installing: {e}"))
         threading.Thread(target=work, daemon=True).start()
 
     def start_conversion_thread(self):
@@ -187,57 +394,143 @@ class FBXConverterApp:
             input_folder = Path(self.input_var.get())
             output_folder = Path(self.output_var.get())
             if not input_folder.exists() or not output_folder.exists():
-                self.events.put(("error", "Error", "Please select valid input and output folders."))
-                self.events.put(("done",))
+                self._emit(("error", "Error", "Please select valid input and output folders."))
+                self._emit(("done",))
                 return
 
-            custom_data_str = self.custom_text.get("1.0", tk.END).strip()
-            custom_data = {}
-            if custom_data_str:
-                try:
-                    custom_data = json.loads(custom_data_str)
-                except json.JSONDecodeError as e:
-                    self.events.put(("error", "Invalid JSON", f"Custom data is not valid JSON:\n{e}"))
-                    self.events.put(("done",))
-                    return
-
-            fbx_files = sorted(list(input_folder.glob("*.fbx")))
+            if self._custom_dirty:
+                custom_data_str = self.custom_text.get("1.0", tk.END).strip()
+                custom_data = {}
+                if custom_data_str:
+                    try:
+                        custom_data = json.loads(custom_data_str)
+                    except json.JSONDecodeError as e:
+                        self._emit(("error", "Invalid JSON", f"Custom data is not valid JSON:\n{e}"))
+                        self._emit(("done",))
+                        return
+                if not custom_data or custom_data == _DEFAULT_CUSTOM_DATA:
+                    custom_data = None
+                self._custom_cache = custom_data
+                self._custom_dirty = False
+            custom_data = self._custom_cache
+
+            # os.scandir reads the directory in one pass without the
+            # per-entry stat that Path.glob's fnmatch walk performs.
+            fbx_files = sorted(
+                Path(entry.path)
+                for entry in os.scandir(input_folder)
+                if entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(".fbx")
+            )
             if not fbx_files:
-                self.events.put(("info", "Info", "No FBX files found in input folder."))
-                self.events.put(("done",))
+                self._emit(("info", "Info", "No FBX files found in input folder."))
+                self._emit(("done",))
                 return
 
-            self.events.put(("setmax", len(fbx_files)))
+            self._emit(("setmax", len(fbx_files)))
             keep_materials = self.keep_materials_var.get()
             remove_textures = self.remove_textures_var.get()
 
-            for i, fbx_file in enumerate(fbx_files, start=1):
-                glb_file = output_folder / (fbx_file.stem + ".glb")
-                self.events.put(("status", f"Processing {fbx_file.name} ({i}/{len(fbx_files)})"))
-                try:
-                    convert_fbx_to_glb(
-                        fbx_file,
-                        glb_file,
-                        keep_materials=keep_materials,
-                        remove_textures=remove_textures,
-                        custom_data=custom_data,
-                    )
-                except subprocess.CalledProcessError as e:
-                    self.events.put(("error", "Conversion failed", f"fbx2gltf failed for {fbx_file.name}:\n{e}"))
-                except Exception as e:
-                    self.events.put(("error", "Error", f"Error processing {fbx_file.name}: {e}"))
-                finally:
-                    self.events.put(("progress", i))
-
-            self.events.put(("status", "Conversion complete"))
-            self.events.put(("info", "Done", f"Converted {len(fbx_files)} FBX files to GLB."))
+            try:
+                max_workers = max(1, self.workers_var.get())
+            except (tk.TclError, ValueError):
+                # The spinbox accepts free typing; junk falls back to
+                # the default rather than killing the worker thread.
+                max_workers = min(4, os.cpu_count() or 1)
+            asyncio.run(self._convert_async(
+                fbx_files, output_folder, max_workers,
+                keep_materials, remove_textures, custom_data,
+            ))
+
+            self._emit(("status", "Conversion complete"))
+            self._emit(("info", "Done", f"Converted {len(fbx_files)} FBX files to GLB."))
         finally:
-            self.events.put(("done",))
+            self._emit(("done",))
+
+    async def _convert_async(self, fbx_files, output_folder, max_workers, keep_materials, remove_textures, custom_data):
+        """Fan out fbx2gltf launches under a semaphore sized from the GUI
+        knob; the Python side just awaits the external binaries, so there
+        is no GIL cost. GLB edits run in a thread pool outside the
+        semaphore so a subprocess slot frees up as soon as the transcoder
+        exits."""
+        out_dir = os.fspath(output_folder)
+        sem = asyncio.Semaphore(min(len(fbx_files), max_workers))
+        loop = asyncio.get_running_loop()
+        total = len(fbx_files)
+        done_count = 0
+
+        async def convert(fbx_file):
+            nonlocal done_count
+            # Plain-string paths: the subprocess argv and open() both want
+            # str anyway, so skip the intermediate Path objects.
+            glb_file = out_dir + os.sep + fbx_file.stem + ".glb"
+            argv = _fbx2gltf_argv(fbx_file, glb_file)
+            try:
+                async with sem:
+                    # One process per file is forced by upstream: fbx2gltf
+                    # has no batch or stdin mode, only -i/-o per run. The
+                    # startup cost is hidden by keeping the semaphore's
+                    # worth of launches in flight at once.
+                    proc = await asyncio.create_subprocess_exec(*argv, close_fds=False)
+                    returncode = await proc.wait()
+                if returncode != 0:
+                    raise subprocess.CalledProcessError(returncode, argv)
+                # Always edit: keeping textures is when dedupe applies,
+                # and _patch_glb skips the write if nothing changed.
+                await loop.run_in_executor(
+                    None, _patch_glb,
+                    glb_file, keep_materials, remove_textures, custom_data,
+                )
+            except subprocess.CalledProcessError as e:
+                self._emit(("error", "Conversion failed", f"fbx2gltf failed for {fbx_file.name}:\n{e}"))
+            except Exception as e:
+                self._emit(("error", "Error", f"Error processing {fbx_file.name}: {e}"))
+            finally:
+                done_count += 1
+                self._emit(("status", f"Processed {fbx_file.name} ({done_count}/{total})"))
+                self._emit(("progress", done_count))
+
+        await asyncio.gather(*(convert(fbx_file) for fbx_file in fbx_files))
 
     # -------------------------
-    # Polling
+    # Event dispatch
     # -------------------------
-    def poll_events(self):
+    def _emit(self, evt: tuple):
+        """Queue an event from a worker thread and wake the Tk main loop.
+
+        event_generate is thread-safe in Tk >= 8.5, so the UI only runs
+        when there is actually something to render.
+
+        Consecutive duplicate status strings are dropped at the producer,
+        and when the bounded queue is full the stalest coalescable event
+        makes room; errors, dialogs and completion markers are never lost.
+        """
+        if evt[0] == "status":
+            if evt[1] == self._last_status:
+                return
+            self._last_status = evt[1]
+        try:
+            self.events.put_nowait(evt)
+        except queue.Full:
+            # Rotate through the queue once, dropping the stalest
+            # progress/status entry and re-queueing everything else in
+            # its original order. Only when nothing was droppable does
+            # the final put block for the UI to catch up.
+            dropped = False
+            for _ in range(self.events.qsize()):
+                try:
+                    oldest = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if not dropped and oldest[0] in ("progress", "status"):
+                    dropped = True
+                    continue
+                self.events.put(oldest)
+            self.events.put(evt)
+        self.root.event_generate("<<ConvEvent>>", when="tail")
+
+    def _drain_events(self, event=None):
+        latest_progress = None
+        latest_status = None
         try:
             while True:
                 evt = self.events.get_nowait()
@@ -245,32 +538,45 @@ class FBXConverterApp:
 
                 if kind == "setmax":
                     self.progress.config(maximum=evt[1], value=0)
+                    latest_progress = None
                 elif kind == "progress":
-                    self.progress.config(value=evt[1])
+                    latest_progress = evt[1]
                 elif kind == "status":
-                    self.status_label.config(text=evt[1], anchor="center")
+                    latest_status = evt[1]
                 elif kind == "info":
                     _, title, msg = evt
                     messagebox.showinfo(title, msg)
                     self.progress.config(value=0)
                     self.status_label.config(text="Idle")
+                    # The reset must win over anything queued earlier.
+                    latest_progress = None
+                    latest_status = None
                 elif kind == "warn":
                     _, title, msg = evt
                     messagebox.showwarning(title, msg)
                     self.progress.config(value=0)
                     self.status_label.config(text="Idle")
+                    latest_progress = None
+                    latest_status = None
                 elif kind == "error":
                     _, title, msg = evt
                     messagebox.showerror(title, msg)
                     self.progress.config(value=0)
                     self.status_label.config(text="Idle")
+                    latest_progress = None
+                    latest_status = None
                 elif kind == "done":
                     self.convert_btn.config(state=tk.NORMAL)
 
         except queue.Empty:
             pass
-        finally:
-            self.root.after(100, self.poll_events)
+
+        # Only the newest progress/status of this batch touches the widgets,
+        # so a fast worker costs one reconfigure per drain, not one per file.
+        if latest_progress is not None:
+            self.progress.config(value=latest_progress)
+        if latest_status is not None:
+            self.status_label.config(text=latest_status, anchor="center")
 
 
 if __name__ == "__main__":